@@ -0,0 +1,213 @@
+import json
+import os
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date, datetime
+
+from lookup_tables import GAME_DIGITS, decode_draw, encode_draw
+
+# --- Configuration ---
+# Every history file the scrapers produce, grouped by the state it belongs to.
+HISTORY_SOURCES = {
+    "florida": ["lottery_net_history.json"],
+    "illinois": ["illinois_history_1.json", "illinois_history_raw.json"],
+}
+# Codes live in signed 64-bit arrays; longer draws (only possible for games
+# outside GAME_DIGITS) are rejected rather than overflowing.
+MAX_CODE_DIGITS = 18
+CODE_TYPECODE = "q"
+
+# --- Source Parsing ---
+
+def parse_draw_date(value):
+    """Accepts the date formats used across the history files and returns a date."""
+    if isinstance(value, date):
+        return value
+    if "-" in value[:4]:
+        # Raw file keys: "01-31-2024"
+        return datetime.strptime(value, "%m-%d-%Y").date()
+    # Scraper dt values: "2013-01-01 00:00:00" or "2013-01-01"
+    return date.fromisoformat(value[:10])
+
+def iter_source_rows(path):
+    """
+    Yields (game, slot, date, numbers) for every draw in a history file.
+    Handles both the year-scrape layout ({"history": {game: {slot: [rows]}}})
+    and the date-keyed raw layout ({game: {"MM-DD-YYYY": {slot: numbers}}}).
+    """
+    with open(path, "r") as f:
+        data = json.load(f)
+
+    if not isinstance(data, dict):
+        return
+
+    if "history" in data:
+        for game, slots in data["history"].items():
+            for slot, rows in slots.items():
+                for row in rows:
+                    yield game, slot, parse_draw_date(row["dt"]), row["numbers"]
+    else:
+        for game, by_date in data.items():
+            for date_str, slots in by_date.items():
+                draw_date = parse_draw_date(date_str)
+                for slot, numbers in slots.items():
+                    yield game, slot, draw_date, numbers
+
+# --- Draw Store ---
+
+class DrawStore:
+    """
+    Keeps every (state, game, slot) series in memory, sorted by date, so
+    range and latest-N lookups are a bisect instead of a file scan.
+    Each draw is held as its straight-number code (see lookup_tables), so
+    analytics can index the precomputed tables directly. Draws that do not
+    encode (wrong digit count, digit outside 0-9) are counted in `rejected`.
+    `version` is bumped whenever the data changes; callers use it to key caches.
+    """
+
+    def __init__(self, sources=None):
+        self.sources = sources or HISTORY_SOURCES
+        self.series = {}
+        self.mtimes = {}
+        self.rejected = {}
+        self.ingested = {}  # (state, game, slot) -> {date: numbers} added through ingest()
+        self.version = 0
+
+    def load(self):
+        """
+        (Re)reads every source file. The first file listed for a state wins on
+        duplicate dates; ingested draws are merged back in for dates the files lack.
+        """
+        return self.apply(*self.read_sources())
+
+    def read_sources(self):
+        """
+        Parses every source file into ({key: {date: numbers}}, mtimes) without
+        touching the store, so callers can run it off the event loop.
+        """
+        by_key = {}
+        mtimes = {}
+        for state, paths in self.sources.items():
+            for path in paths:
+                if not os.path.exists(path):
+                    continue
+                mtimes[path] = os.path.getmtime(path)
+                for game, slot, draw_date, numbers in iter_source_rows(path):
+                    by_key.setdefault((state, game, slot), {}).setdefault(draw_date, numbers)
+        return by_key, mtimes
+
+    def apply(self, by_key, mtimes):
+        """Swaps in series built from read_sources() output plus the ingested draws."""
+        for key, rows in self.ingested.items():
+            by_date = by_key.setdefault(key, {})
+            for draw_date, numbers in rows.items():
+                by_date.setdefault(draw_date, numbers)
+
+        series, rejected = {}, {}
+        for key, by_date in by_key.items():
+            series[key], count = self._build_series(key, by_date)
+            if count:
+                rejected[key] = count
+
+        self.series = series
+        self.rejected = rejected
+        self.mtimes = mtimes
+        self.version += 1
+        return self
+
+    def changed(self):
+        """True if any source file changed on disk since the last load."""
+        for state, paths in self.sources.items():
+            for path in paths:
+                if not os.path.exists(path):
+                    continue
+                if self.mtimes.get(path) != os.path.getmtime(path):
+                    return True
+        return False
+
+    def refresh(self):
+        """Reloads if any source file changed on disk. Returns True when it did."""
+        if self.changed():
+            self.load()
+            return True
+        return False
+
+    def ingest(self, state, game, slot, draws):
+        """
+        Merges new (date, numbers) draws into a series. Existing dates are kept
+        and draws that don't encode for the game are skipped. Added draws are
+        kept in memory only, but survive reloads of the source files.
+        Returns the number of draws added; the version only moves if that is > 0.
+        """
+        key = (state, game, slot)
+        series = self.series.get(key)
+        if series:
+            digits = series["digits"]
+            by_date = dict(zip(series["dates"], series["codes"]))
+        else:
+            digits = GAME_DIGITS.get(game) or max((len(n) for _, n in draws), default=0)
+            by_date = {}
+
+        new_rows = {}
+        for draw_date, numbers in draws:
+            draw_date = parse_draw_date(draw_date)
+            code = encode_draw(numbers, digits) if digits <= MAX_CODE_DIGITS else -1
+            if code >= 0 and draw_date not in by_date:
+                by_date[draw_date] = code
+                new_rows[draw_date] = list(numbers)
+
+        if new_rows:
+            # Build the new series first so a failure leaves the store untouched.
+            ordered = sorted(by_date.items())
+            series = {
+                "digits": digits,
+                "dates": [d for d, _ in ordered],
+                "codes": array(CODE_TYPECODE, [c for _, c in ordered]),
+            }
+            self.series[key] = series
+            self.ingested.setdefault(key, {}).update(new_rows)
+            self.version += 1
+        return len(new_rows)
+
+    def keys(self):
+        return sorted(self.series.keys())
+
+    def select(self, state, game, slot, start=None, end=None, window=None):
+        """
+        Returns draws as {"date", "numbers"} dicts (oldest first), the shape
+        merge_and_analyze.analyze_combo_performance expects.
+        `start`/`end` are inclusive dates; `window` keeps only the latest N after filtering.
+        """
+        dates, codes = self.select_codes(state, game, slot, start, end, window)
+        digits = self.series[(state, game, slot)]["digits"] if dates else 0
+        return [{"date": d, "numbers": decode_draw(c, digits)} for d, c in zip(dates, codes)]
+
+    def select_codes(self, state, game, slot, start=None, end=None, window=None):
+        """Same filtering as select(), returned as (dates, codes) slices for table lookups."""
+        series = self.series.get((state, game, slot))
+        if not series:
+            return [], array(CODE_TYPECODE)
+
+        dates = series["dates"]
+        lo = bisect_left(dates, start) if start else 0
+        hi = bisect_right(dates, end) if end else len(dates)
+        if window is not None:
+            lo = max(lo, hi - window)
+        return dates[lo:hi], series["codes"][lo:hi]
+
+    def _build_series(self, key, by_date):
+        game = key[1]
+        digits = GAME_DIGITS.get(game)
+        if digits is None:
+            # Unknown game: take the digit count from the draws themselves.
+            digits = max((len(n) for n in by_date.values()), default=0)
+
+        dates, codes, rejected = [], array(CODE_TYPECODE), 0
+        for draw_date, numbers in sorted(by_date.items()):
+            code = encode_draw(numbers, digits) if digits <= MAX_CODE_DIGITS else -1
+            if code < 0:
+                rejected += 1
+                continue
+            dates.append(draw_date)
+            codes.append(code)
+        return {"digits": digits, "dates": dates, "codes": codes}, rejected
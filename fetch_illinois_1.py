@@ -1,8 +1,9 @@
-import requests
 from bs4 import BeautifulSoup
 from datetime import datetime
 import json
-import time
+
+from history_reader import refresh_index
+from instrumentation import instrumented_get, span, start_run, timed_sleep
 
 BASE_URL = "https://www.lottery.net"
 HEADERS = {
@@ -41,42 +42,43 @@ def scrape_draws(pick, draw_type):
         url = f"{BASE_URL}/{state_url}/pick-{pick}-{draw_type}/numbers/{yr}"
         print(f"Fetching: {url}")
 
-        resp = requests.get(url, headers=HEADERS)
+        resp = instrumented_get(url, headers=HEADERS)
         if resp.status_code != 200:
             print(f"❌ Failed for {url}")
             continue
 
-        soup = BeautifulSoup(resp.text, "html.parser")
-        rows = soup.find_all("tr")
+        with span("scrape_draws.parse", label=url):
+            soup = BeautifulSoup(resp.text, "html.parser")
+            rows = soup.find_all("tr")
 
-        for row in rows:
-            tds = row.find_all("td")
-            if len(tds) < 2:
-                continue
+            for row in rows:
+                tds = row.find_all("td")
+                if len(tds) < 2:
+                    continue
 
-            # Example date text: "Wed Apr 16, 2020"
-            parts = tds[0].text.strip().split()
-            if len(parts) < 4:
-                continue
+                # Example date text: "Wed Apr 16, 2020"
+                parts = tds[0].text.strip().split()
+                if len(parts) < 4:
+                    continue
 
-            month, day, year = parts[1], parts[2].rstrip(","), parts[3]
-            base_date_str, dt = parse_base_date(month, day, year)
+                month, day, year = parts[1], parts[2].rstrip(","), parts[3]
+                base_date_str, dt = parse_base_date(month, day, year)
 
-            raw = tds[1].get_text(separator=" ").strip()
-            digits = [int(x) for x in raw.split() if x.isdigit()]
-            if len(digits) < pick:
-                continue
+                raw = tds[1].get_text(separator=" ").strip()
+                digits = [int(x) for x in raw.split() if x.isdigit()]
+                if len(digits) < pick:
+                    continue
 
-            numbers = digits[:pick]
+                numbers = digits[:pick]
 
-            out.append({
-                "dt": dt,
-                "date_str": f"{base_date_str} ({draw_type})",
-                "slot": draw_type,
-                "numbers": numbers
-            })
+                out.append({
+                    "dt": dt,
+                    "date_str": f"{base_date_str} ({draw_type})",
+                    "slot": draw_type,
+                    "numbers": numbers
+                })
 
-        time.sleep(1)  # respectful delay
+        timed_sleep(1)  # respectful delay
 
     out.sort(key=lambda r: r["dt"])
     return out
@@ -86,6 +88,8 @@ def scrape_draws(pick, draw_type):
 # Run scraper
 # ------------------------------
 if __name__ == "__main__":
+    start_run("fetch_illinois_1")
+
     final_data = {
         "house": "Illinois",
         "generated_at": datetime.utcnow().isoformat() + "Z",
@@ -97,11 +101,13 @@ if __name__ == "__main__":
 
         for draw in draw_types:
             print(f"\n=== Scraping Illinois Pick {pick} ({draw}) ===")
-            results = scrape_draws(pick, draw)
+            with span("scrape_draws", label=f"pick{pick}/{draw}"):
+                results = scrape_draws(pick, draw)
             final_data["history"][f"pick{pick}"][draw] = results
 
     # Save JSON
     with open("illinois_history_1.json", "w") as f:
         json.dump(final_data, f, indent=2, default=str)
+    refresh_index("illinois_history_1.json")
 
     print("\n✓ Completed! Saved → illinois_history_1.json")
@@ -1,6 +1,5 @@
 import os
 import json
-import time
 import random
 import signal
 import sys
@@ -8,6 +7,11 @@ from datetime import datetime, timedelta
 import requests
 from bs4 import BeautifulSoup
 
+from history_reader import refresh_index
+from instrumentation import instrumented_get, record_cache, span, start_run, timed, timed_sleep
+from lookup_tables import bincount, encode_draws, gather, get_tables
+from validate_history import GAP_FILE, load_gaps
+
 # --- Configuration ---
 BASE_URL = "https://www.lottery.net/illinois"
 RAW_DATA_FILE = "illinois_history_raw.json"
@@ -39,14 +43,19 @@ def fetch_il_draw(date_str, pick=3, draw_type="midday"):
     
     try:
         # Random sleep to act like a human
-        time.sleep(random.uniform(0.5, 1.5))
-        resp = requests.get(url, headers=HEADERS, timeout=15)
+        timed_sleep(random.uniform(0.5, 1.5))
+        resp = instrumented_get(url, headers=HEADERS, timeout=15)
         resp.raise_for_status()
     except requests.RequestException as e:
         print(f"[ERROR] Failed fetching {url}: {e}")
         return None
 
-    soup = BeautifulSoup(resp.text, "html.parser")
+    with span("fetch_il_draw.parse", label=url):
+        return parse_il_draw(resp.text, pick, draw_type)
+
+def parse_il_draw(html, pick, draw_type):
+    """Extracts the drawn numbers from a lottery.net results page, or None."""
+    soup = BeautifulSoup(html, "html.parser")
 
     # TARGET SPECIFIC HTML STRUCTURE
     # Look for <ul class="illinois results pick-3-midday">
@@ -75,6 +84,7 @@ def fetch_il_draw(date_str, pick=3, draw_type="midday"):
     print(f"   -> Found: {result}")
     return result
 
+@timed()
 def load_raw_data():
     """Safely loads the raw history file."""
     if os.path.exists(RAW_DATA_FILE):
@@ -89,6 +99,7 @@ def load_raw_data():
             return {}
     return {}
 
+@timed()
 def save_raw_data(data):
     with open(RAW_DATA_FILE, "w") as f:
         json.dump(data, f, indent=2)
@@ -121,14 +132,18 @@ def fetch_il_history(start_year=2024, end_year=2025):
                 data["pick3"][date_str] = {}
 
             # Midday
-            if "midday" not in data["pick3"][date_str]:
+            cached = "midday" in data["pick3"][date_str]
+            record_cache("raw_history", cached)
+            if not cached:
                 print(f"Fetching Pick 3 Midday: {date_str}...", end="")
                 nums = fetch_il_draw(date_str, 3, "midday")
                 if nums: data["pick3"][date_str]["midday"] = nums
                 else: print(" No data.")
 
             # Evening
-            if "evening" not in data["pick3"][date_str]:
+            cached = "evening" in data["pick3"][date_str]
+            record_cache("raw_history", cached)
+            if not cached:
                 print(f"Fetching Pick 3 Evening: {date_str}...", end="")
                 nums = fetch_il_draw(date_str, 3, "evening")
                 if nums: data["pick3"][date_str]["evening"] = nums
@@ -139,14 +154,18 @@ def fetch_il_history(start_year=2024, end_year=2025):
                 data["pick4"][date_str] = {}
 
             # Midday
-            if "midday" not in data["pick4"][date_str]:
+            cached = "midday" in data["pick4"][date_str]
+            record_cache("raw_history", cached)
+            if not cached:
                 print(f"Fetching Pick 4 Midday: {date_str}...", end="")
                 nums = fetch_il_draw(date_str, 4, "midday")
                 if nums: data["pick4"][date_str]["midday"] = nums
                 else: print(" No data.")
 
             # Evening
-            if "evening" not in data["pick4"][date_str]:
+            cached = "evening" in data["pick4"][date_str]
+            record_cache("raw_history", cached)
+            if not cached:
                 print(f"Fetching Pick 4 Evening: {date_str}...", end="")
                 nums = fetch_il_draw(date_str, 4, "evening")
                 if nums: data["pick4"][date_str]["evening"] = nums
@@ -162,8 +181,47 @@ def fetch_il_history(start_year=2024, end_year=2025):
     save_raw_data(data)
     return data
 
+def fill_il_gaps(gaps):
+    """Fetches only the (date, game, slot) holes listed by validate_history.py."""
+    global KEEP_RUNNING
+    data = load_raw_data()
+
+    for gap in gaps:
+        if not KEEP_RUNNING: break
+
+        game, slot = gap["game"], gap["slot"]
+        pick = int(game.replace("pick", ""))
+        if game not in data: data[game] = {}
+
+        current_date = datetime.strptime(gap["start"], "%Y-%m-%d")
+        end_date = datetime.strptime(gap["end"], "%Y-%m-%d")
+        while current_date <= end_date:
+            if not KEEP_RUNNING: break
+
+            date_str = current_date.strftime("%m-%d-%Y")
+            if date_str not in data[game]:
+                data[game][date_str] = {}
+
+            if slot not in data[game][date_str]:
+                print(f"Fetching Pick {pick} {slot.title()}: {date_str}...", end="")
+                nums = fetch_il_draw(date_str, pick, slot)
+                if nums: data[game][date_str][slot] = nums
+                else: print(" No data.")
+
+            current_date += timedelta(days=1)
+
+        save_raw_data(data)
+
+    save_raw_data(data)
+    return data
+
 # --- Part 2: Analysis & Frontend Generation ---
 
+def format_combo(pair):
+    """Front-pair bin (0-99) as its two-digit combo; side-counted keys are already strings."""
+    return f"{pair:02d}" if isinstance(pair, int) else pair
+
+@timed()
 def calculate_stats(raw_data):
     """Converts raw date-keyed data into the format App.tsx expects."""
     
@@ -177,23 +235,44 @@ def calculate_stats(raw_data):
     latest_p4_draw = raw_data["pick4"].get(latest_p4_date, {}) if latest_p4_date else {}
 
     # Logic for "Top Combos" (Mock logic based on frequency of first 2 digits)
-    combos_counts = {}
-    
     # Analyze last 60 draws for hot combos
+    recent = []
     for d_str in sorted_dates_p3[:60]:
         draw = raw_data["pick3"][d_str]
         for t in ["midday", "evening"]:
             if t in draw:
-                nums = draw[t]
-                if len(nums) >= 2:
-                    # Simple strategy: pair the first two numbers
-                    key = f"{nums[0]}{nums[1]}"
-                    combos_counts[key] = combos_counts.get(key, 0) + 1
+                recent.append(draw[t])
+
+    # Simple strategy: pair the first two numbers. Each draw is encoded once, its
+    # front pair gathered from the lookup table and all pairs counted in one bincount.
+    pairs = gather(get_tables("pick3").front_pair, encode_draws(recent, "pick3"))
+
+    # Rows that don't encode as a Pick 3 still count by their first two numbers.
+    # Two-digit keys (e.g. [1, 2] -> 12) share the table's bins; anything else
+    # (e.g. [12, 3] -> "123") is counted on the side as before.
+    other_counts = {}  # key -> [wins, first row]
+    for i, nums in enumerate(recent):
+        if pairs[i] is not None or len(nums) < 2:
+            continue
+        key = f"{nums[0]}{nums[1]}"
+        if len(key) == 2 and key.isascii() and key.isdigit():
+            pairs[i] = int(key)
+        else:
+            other_counts.setdefault(key, [0, i])[0] += 1
+    counts = bincount(pairs, 100)
+
+    # Rank by wins; ties keep first-seen order, as the original dict count did.
+    ranked = [(counts[p], pairs.index(p), p) for p in dict.fromkeys(pairs) if p is not None]
+    ranked += [(wins, first, key) for key, (wins, first) in other_counts.items()]
+    ranked.sort(key=lambda r: r[1])
+    # Every key seen, in first-seen order, for the state snapshot
+    combo_keys = [format_combo(pair) for _, _, pair in ranked]
+    ranked.sort(key=lambda r: -r[0])
 
     top_combos = []
-    for k, v in sorted(combos_counts.items(), key=lambda item: item[1], reverse=True)[:5]:
+    for v, _, pair in ranked[:5]:
         top_combos.append({
-            "combo": k,
+            "combo": format_combo(pair),
             "wins": v,
             "latest_play": datetime.now().isoformat(),
             "pairs": [],
@@ -231,7 +310,7 @@ def calculate_stats(raw_data):
             }
         ],
         "state_snapshot": {
-            "combo_states": {k: "on" for k in combos_counts.keys()},
+            "combo_states": {k: "on" for k in combo_keys},
             "stopped_candidates": {}
         }
     }
@@ -240,11 +319,22 @@ def calculate_stats(raw_data):
 if __name__ == "__main__":
     print("--- Catalyst Engine: Illinois Module ---")
     print("Press Ctrl+C at any time to stop safely.")
+    start_run("fetch_illinois_2")
 
     # 1. Fetch History
-    print("Step 1: Updating History...")
-    # Adjust years as needed
-    raw_data = fetch_il_history(start_year=2024, end_year=2025)
+    if "--gaps" in sys.argv:
+        # Re-fetch only the missing draws found by validate_history.py
+        print(f"Step 1: Filling gaps from {GAP_FILE}...")
+        with span("fill_il_gaps"):
+            raw_data = fill_il_gaps(load_gaps(GAP_FILE, state="illinois"))
+    else:
+        print("Step 1: Updating History...")
+        # Adjust years as needed
+        with span("fetch_il_history"):
+            raw_data = fetch_il_history(start_year=2024, end_year=2025)
+
+    # Keep the history reader's offset index warm for the new file
+    refresh_index(RAW_DATA_FILE)
 
     # 2. Generate Frontend Data
     print("\nStep 2: Analyzing & Formatting...")
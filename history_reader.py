@@ -0,0 +1,356 @@
+import json
+import os
+import re
+import sys
+import time
+import tracemalloc
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date
+
+from draw_store import parse_draw_date
+from instrumentation import record_cache, span
+
+# --- Configuration ---
+INDEX_SUFFIX = ".idx"
+INDEX_FORMAT = 2
+CHUNK_SIZE = 1 << 16
+
+# --- Streaming Scanner ---
+# Walks the raw bytes of a JSON document and decodes only the containers
+# (objects/arrays) whose key path the caller asks for. Everything else is
+# skipped by looking at structural characters and strings, so the document
+# is never materialized.
+
+_STRUCTURAL = re.compile(rb'["{}\[\]:,]')
+_STRING_TAIL = re.compile(rb'(?:[^"\\]|\\.)*"', re.S)
+_NEXT_ITEM = re.compile(rb'\s*,\s*[{\[]')
+_DECODER = json.JSONDecoder()
+
+def _decode_at(buf, pos):
+    """Decodes the JSON value starting at buf[pos]. Returns (value, end) or None if buf is too short."""
+    size = 256
+    while True:
+        window = buf[pos:pos + size]
+        text = window.decode("utf-8", "surrogateescape")
+        try:
+            value, end = _DECODER.raw_decode(text)
+        except ValueError:
+            if pos + size >= len(buf):
+                return None
+            size *= 4
+            continue
+        if not text.isascii():
+            end = len(text[:end].encode("utf-8", "surrogateescape"))
+        return value, pos + end
+
+def scan_containers(f, want, want_strings=None, chunk_size=CHUNK_SIZE):
+    """
+    Yields (path, start, end, value) for containers where want(path) is true,
+    and for string values where want_strings(path) is true.
+    `path` is the tuple of object keys / array indexes leading to the value,
+    `start`/`end` its byte span in the file.
+    """
+    buf = b""
+    base = 0  # file offset of buf[0]
+    pos = 0
+    stack = []  # frames: [is_object, current_key_or_index, expecting_key]
+
+    def more(keep_from):
+        nonlocal buf, base, pos
+        chunk = f.read(chunk_size)
+        if not chunk:
+            return False
+        base += keep_from
+        buf, pos = buf[keep_from:] + chunk, pos - keep_from
+        return True
+
+    while True:
+        m = _STRUCTURAL.search(buf, pos)
+        if m is None:
+            if not more(len(buf)):
+                break
+            continue
+
+        pos = m.start()
+        ch = buf[pos:pos + 1]
+
+        if ch == b'"':
+            tail = _STRING_TAIL.match(buf, pos + 1)
+            if tail is None:
+                # String runs past the buffer: keep it and read more.
+                if not more(pos):
+                    raise ValueError(f"unterminated string at byte {base + pos}")
+                continue
+            if stack and stack[-1][0] and stack[-1][2]:
+                stack[-1][1] = json.loads(buf[pos:tail.end()])
+            elif want_strings is not None:
+                path = tuple(frame[1] for frame in stack)
+                if want_strings(path):
+                    yield path, base + pos, base + tail.end(), json.loads(buf[pos:tail.end()])
+            pos = tail.end()
+            continue
+
+        if ch == b":":
+            stack[-1][2] = False
+        elif ch == b",":
+            frame = stack[-1]
+            if frame[0]:
+                frame[2] = True
+            else:
+                frame[1] += 1
+        elif ch in (b"{", b"["):
+            path = tuple(frame[1] for frame in stack)
+            if want(path):
+                decoded = _decode_at(buf, pos)
+                if decoded is None:
+                    if not more(pos):
+                        raise ValueError(f"truncated value at byte {base + pos}")
+                    continue
+                value, end = decoded
+                yield path, base + pos, base + end, value
+                pos = end
+                # Fast path for arrays of wanted records: step straight to the
+                # next element instead of going back through the token loop.
+                if stack and not stack[-1][0]:
+                    nxt = _NEXT_ITEM.match(buf, pos)
+                    if nxt is not None:
+                        stack[-1][1] += 1
+                        pos = nxt.end() - 1
+                continue
+            is_object = ch == b"{"
+            stack.append([is_object, None if is_object else 0, is_object])
+        else:
+            stack.pop()
+        pos += 1
+
+# --- Offset Index Sidecar ---
+# Layout: one JSON header line, then for each series three binary arrays
+# (date ordinals, start offsets, end offsets) in date order.
+
+def _history_record(path):
+    # Year-scrape layout: {"history": {game: {slot: [record, ...]}}}
+    return len(path) == 4 and path[0] == "history"
+
+def _raw_record(path):
+    # Date-keyed raw layout: {game: {"MM-DD-YYYY": {slot: numbers}}}
+    return len(path) == 2 and path[0] != "history"
+
+def _record(path):
+    return _history_record(path) or _raw_record(path)
+
+def _top_level_string(path):
+    # "house", "generated_at": kept so readers can rebuild the document header
+    return len(path) == 1
+
+def build_index(source_path, index_path):
+    """Scans a history file once and writes the offset index sidecar."""
+    entries = {}  # "game/slot" -> [(ordinal, start, end)]
+    meta = {}
+    layout = None
+
+    with open(source_path, "rb") as f:
+        for path, start, end, record in scan_containers(f, _record, _top_level_string):
+            if isinstance(record, str):
+                meta[path[0]] = record
+            elif _history_record(path):
+                layout = "history"
+                game, slot = path[1], path[2]
+                ordinal = parse_draw_date(record["dt"]).toordinal()
+                entries.setdefault(f"{game}/{slot}", []).append((ordinal, start, end))
+            elif isinstance(record, dict):
+                layout = "raw"
+                game, ordinal = path[0], parse_draw_date(path[1]).toordinal()
+                for slot in record:
+                    entries.setdefault(f"{game}/{slot}", []).append((ordinal, start, end))
+
+    stat = os.stat(source_path)
+    header = {
+        "format": INDEX_FORMAT,
+        "layout": layout,
+        "source_size": stat.st_size,
+        "source_mtime_ns": stat.st_mtime_ns,
+        "meta": meta,
+        "series": {},
+    }
+    blocks = []
+    for key, rows in sorted(entries.items()):
+        rows.sort(key=lambda r: r[0])
+        blocks.append((key, array("i", [r[0] for r in rows]), array("q", [r[1] for r in rows]),
+                       array("q", [r[2] for r in rows])))
+
+    # Offsets in the header are relative to the end of the header line.
+    offset = 0
+    for key, ordinals, starts, ends in blocks:
+        header["series"][key] = [offset, len(ordinals)]
+        offset += ordinals.itemsize * len(ordinals) + starts.itemsize * len(starts) * 2
+
+    tmp_path = index_path + ".tmp"
+    with open(tmp_path, "wb") as out:
+        out.write(json.dumps(header).encode("utf-8") + b"\n")
+        for _, ordinals, starts, ends in blocks:
+            ordinals.tofile(out)
+            starts.tofile(out)
+            ends.tofile(out)
+    os.replace(tmp_path, index_path)
+    return header
+
+def refresh_index(source_path):
+    """
+    Rebuilds the sidecar right after a scraper writes `source_path`, so the
+    first reader of the day doesn't pay for the scan.
+    """
+    with span("history_reader.build_index", label=source_path):
+        return build_index(source_path, source_path + INDEX_SUFFIX)
+
+def read_index_header(source_path, index_path):
+    """Returns (header, data_offset) if the sidecar is current for the source, else None."""
+    if not os.path.exists(index_path):
+        return None
+    with open(index_path, "rb") as f:
+        line = f.readline()
+    try:
+        header = json.loads(line)
+    except ValueError:
+        return None
+    stat = os.stat(source_path)
+    if (header.get("format") != INDEX_FORMAT or header.get("source_size") != stat.st_size
+            or header.get("source_mtime_ns") != stat.st_mtime_ns):
+        return None
+    return header, len(line)
+
+# --- Reader ---
+
+class HistoryReader:
+    """
+    Reads the latest N draws, a date range, or a whole (game, slot) series out
+    of a history file without json.load-ing the document. The offset index is
+    built on first use and rebuilt whenever the source file changes.
+    Draws come back oldest first as {"date", "slot", "numbers"} dicts.
+    """
+
+    def __init__(self, source_path, index_path=None):
+        self.source_path = source_path
+        self.index_path = index_path or source_path + INDEX_SUFFIX
+        self._header = None
+        self._data_offset = 0
+        self._series = {}
+
+    def _ensure_index(self):
+        current = read_index_header(self.source_path, self.index_path)
+        record_cache("history_index", current is not None)
+        if current is None:
+            with span("history_reader.build_index", label=self.source_path):
+                build_index(self.source_path, self.index_path)
+            current = read_index_header(self.source_path, self.index_path)
+        if self._header is None or current[0] != self._header:
+            self._header, self._data_offset = current
+            self._series = {}
+
+    def _load_series(self, game, slot):
+        self._ensure_index()
+        key = f"{game}/{slot}"
+        if key in self._series:
+            return self._series[key]
+
+        entry = self._header["series"].get(key)
+        ordinals, starts, ends = array("i"), array("q"), array("q")
+        if entry:
+            offset, count = entry
+            with open(self.index_path, "rb") as f:
+                f.seek(self._data_offset + offset)
+                ordinals.fromfile(f, count)
+                starts.fromfile(f, count)
+                ends.fromfile(f, count)
+        self._series[key] = (ordinals, starts, ends)
+        return self._series[key]
+
+    def keys(self):
+        self._ensure_index()
+        return [tuple(k.split("/", 1)) for k in self._header["series"]]
+
+    def meta(self):
+        """Top-level string fields of the document, e.g. {"house", "generated_at"}."""
+        self._ensure_index()
+        return dict(self._header.get("meta", {}))
+
+    def _read(self, slot, starts, ends, ordinals, lo, hi):
+        draws = []
+        if lo >= hi:
+            return draws
+        with open(self.source_path, "rb") as f:
+            for i in range(lo, hi):
+                f.seek(starts[i])
+                record = json.loads(f.read(ends[i] - starts[i]))
+                numbers = record["numbers"] if self._header["layout"] == "history" else record[slot]
+                draws.append({"date": date.fromordinal(ordinals[i]), "slot": slot, "numbers": numbers})
+        return draws
+
+    def latest(self, game, slot, n):
+        ordinals, starts, ends = self._load_series(game, slot)
+        return self._read(slot, starts, ends, ordinals, max(0, len(ordinals) - n), len(ordinals))
+
+    def date_range(self, game, slot, start=None, end=None):
+        """Inclusive range; either bound may be omitted."""
+        ordinals, starts, ends = self._load_series(game, slot)
+        lo = bisect_left(ordinals, parse_draw_date(start).toordinal()) if start else 0
+        hi = bisect_right(ordinals, parse_draw_date(end).toordinal()) if end else len(ordinals)
+        return self._read(slot, starts, ends, ordinals, lo, hi)
+
+    def series(self, game, slot):
+        ordinals, starts, ends = self._load_series(game, slot)
+        return self._read(slot, starts, ends, ordinals, 0, len(ordinals))
+
+# --- Benchmark: reader vs. full json.load ---
+
+def _measure(fn, setup=None):
+    """Times fn() untraced, then runs it again under tracemalloc for the peak (tracing inflates time)."""
+    if setup:
+        setup()
+    started = time.perf_counter()
+    result = fn()
+    elapsed = time.perf_counter() - started
+
+    if setup:
+        setup()
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return result, elapsed, peak
+
+def _full_load_latest(path, game, slot, n):
+    with open(path, "r") as f:
+        data = json.load(f)
+    if "history" in data:
+        return data["history"][game][slot][-n:]
+    by_date = data[game]
+    dates = sorted(by_date, key=parse_draw_date)
+    return [by_date[d][slot] for d in dates if slot in by_date[d]][-n:]
+
+def benchmark(path, game="pick3", slot="midday", n=60, year=None):
+    index_path = path + INDEX_SUFFIX
+
+    def drop_index():
+        if os.path.exists(index_path):
+            os.remove(index_path)
+
+    year = year or date.today().year - 1
+    cases = [
+        ("full json.load, latest N", lambda: _full_load_latest(path, game, slot, n), None),
+        ("reader latest N (cold, builds index)", lambda: HistoryReader(path).latest(game, slot, n), drop_index),
+        ("reader latest N (warm index)", lambda: HistoryReader(path).latest(game, slot, n), None),
+        (f"reader date range {year}", lambda: HistoryReader(path).date_range(game, slot, f"{year}-01-01", f"{year}-12-31"), None),
+    ]
+
+    print(f"{path}  [{game}/{slot}, N={n}]  size={os.path.getsize(path) / 1e6:.2f} MB")
+    print(f"{'case':<40}{'time ms':>10}{'peak KiB':>12}{'draws':>8}")
+    for label, fn, setup in cases:
+        result, elapsed, peak = _measure(fn, setup)
+        print(f"{label:<40}{elapsed * 1000:>10.2f}{peak / 1024:>12.1f}{len(result):>8}")
+
+if __name__ == "__main__":
+    paths = sys.argv[1:] or ["lottery_net_history.json", "illinois_history_raw.json"]
+    for p in paths:
+        benchmark(p)
+        print()
@@ -0,0 +1,267 @@
+import atexit
+import cProfile
+import json
+import os
+import pstats
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+
+import requests
+
+try:
+    import resource  # not available on Windows
+except ImportError:
+    resource = None
+
+# --- Configuration ---
+REPORT_DIR = "run_reports"
+# Comma-separated stage names to run under cProfile, or "all". e.g. LOTTO_PROFILE=fetch_il_draw.parse
+PROFILE_ENV = "LOTTO_PROFILE"
+LATENCY_BUCKETS_MS = [50, 100, 250, 500, 1000, 2500, 5000, 10000, 15000]
+RETRY_BUCKETS = [0, 1, 2, 3, 5]
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+SLOWEST_KEPT = 5
+
+# --- Metrics ---
+
+class Histogram:
+    """Fixed buckets for the report plus the raw samples for exact percentiles."""
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.samples = []
+
+    def observe(self, value):
+        self.samples.append(value)
+
+    def to_dict(self):
+        values = sorted(self.samples)
+        if not values:
+            return {"count": 0}
+        counts = {f"<={b}": 0 for b in self.buckets}
+        counts[f">{self.buckets[-1]}"] = 0
+        for v in values:
+            for b in self.buckets:
+                if v <= b:
+                    counts[f"<={b}"] += 1
+                    break
+            else:
+                counts[f">{self.buckets[-1]}"] += 1
+
+        def pct(p):
+            return values[min(len(values) - 1, int(round(p / 100 * (len(values) - 1))))]
+
+        return {
+            "count": len(values),
+            "sum": round(sum(values), 3),
+            "min": round(values[0], 3),
+            "p50": round(pct(50), 3),
+            "p95": round(pct(95), 3),
+            "p99": round(pct(99), 3),
+            "max": round(values[-1], 3),
+            "buckets": counts,
+        }
+
+class Run:
+    """Collects spans, histograms, counters and cache stats for one script run."""
+
+    def __init__(self, name):
+        self.name = name
+        self.started_at = datetime.now()
+        self.started = time.perf_counter()
+        self.stages = {}
+        self.histograms = {}
+        self.counters = {}
+        self.caches = {}
+        self.profiles = {}
+        self.report_path = None
+        wanted = os.getenv(PROFILE_ENV, "")
+        self.profile_stages = {s.strip() for s in wanted.split(",") if s.strip()}
+
+    def record_stage(self, name, seconds, label=None):
+        stage = self.stages.setdefault(name, {"calls": 0, "total_s": 0.0, "max_s": 0.0, "slowest": []})
+        stage["calls"] += 1
+        stage["total_s"] += seconds
+        stage["max_s"] = max(stage["max_s"], seconds)
+        if label is not None:
+            slowest = stage["slowest"]
+            slowest.append((seconds, str(label)))
+            slowest.sort(reverse=True)
+            del slowest[SLOWEST_KEPT:]
+
+    def histogram(self, name, buckets):
+        if name not in self.histograms:
+            self.histograms[name] = Histogram(buckets)
+        return self.histograms[name]
+
+    def count(self, name, n=1):
+        self.counters[name] = self.counters.get(name, 0) + n
+
+    def record_cache(self, name, hit):
+        cache = self.caches.setdefault(name, {"hits": 0, "misses": 0})
+        cache["hits" if hit else "misses"] += 1
+
+    def wants_profile(self, stage):
+        return "all" in self.profile_stages or stage in self.profile_stages
+
+    def report(self):
+        stages = {}
+        for name, s in sorted(self.stages.items(), key=lambda item: item[1]["total_s"], reverse=True):
+            stages[name] = {
+                "calls": s["calls"],
+                "total_s": round(s["total_s"], 4),
+                "mean_ms": round(s["total_s"] / s["calls"] * 1000, 3),
+                "max_ms": round(s["max_s"] * 1000, 3),
+            }
+            if s["slowest"]:
+                stages[name]["slowest"] = [{"label": l, "ms": round(t * 1000, 3)} for t, l in s["slowest"]]
+
+        caches = {}
+        for name, c in self.caches.items():
+            total = c["hits"] + c["misses"]
+            caches[name] = dict(c, hit_rate=round(c["hits"] / total, 4) if total else None)
+
+        return {
+            "run": self.name,
+            "started_at": self.started_at.isoformat(),
+            "finished_at": datetime.now().isoformat(),
+            "wall_s": round(time.perf_counter() - self.started, 4),
+            "peak_rss_mb": peak_rss_mb(),
+            "stages": stages,
+            "histograms": {name: h.to_dict() for name, h in self.histograms.items()},
+            "counters": dict(sorted(self.counters.items())),
+            "caches": caches,
+            "profiles": self.profiles,
+        }
+
+def peak_rss_mb():
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes.
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 2)
+
+# --- Module-level API ---
+# Scripts call start_run() once; everything else is a no-op-cheap call on the
+# current run so library code can be instrumented unconditionally.
+
+_RUN = Run("unnamed")
+# Only one cProfile profiler can run at a time; nested profiled spans are
+# already covered by the outer one.
+_ACTIVE_PROFILER = None
+
+def start_run(name):
+    """Starts a fresh run and writes its report when the process exits."""
+    global _RUN
+    _RUN = Run(name)
+    atexit.register(write_report, _RUN)
+    return _RUN
+
+def current_run():
+    return _RUN
+
+@contextmanager
+def span(name, label=None):
+    """
+    Times a block as stage `name`. `label` identifies the call in the stage's slowest list.
+    A profiled span nested inside another profiled span shows up in the outer profile only.
+    """
+    global _ACTIVE_PROFILER
+    run = _RUN
+    profiler = None
+    if _ACTIVE_PROFILER is None and run.wants_profile(name):
+        profiler = _ACTIVE_PROFILER = cProfile.Profile()
+        profiler.enable()
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        run.record_stage(name, time.perf_counter() - started, label)
+        if profiler is not None:
+            profiler.disable()
+            _ACTIVE_PROFILER = None
+            _merge_profile(run, name, profiler)
+
+def timed(name=None, label=None):
+    """Decorator form of span(). `label` is an optional fn(*args, **kwargs) -> str."""
+    def decorate(fn):
+        stage = name or fn.__name__
+
+        @wraps(fn)
+        def wrapper(*args, **kwargs):
+            with span(stage, label(*args, **kwargs) if label else None):
+                return fn(*args, **kwargs)
+        return wrapper
+    return decorate
+
+def count(name, n=1):
+    _RUN.count(name, n)
+
+def observe(name, value, buckets=LATENCY_BUCKETS_MS):
+    _RUN.histogram(name, buckets).observe(value)
+
+def record_cache(name, hit):
+    _RUN.record_cache(name, hit)
+
+def timed_sleep(seconds, name="sleep"):
+    """time.sleep() that shows up as its own stage, so politeness delays aren't mistaken for network time."""
+    with span(name):
+        time.sleep(seconds)
+
+def instrumented_get(url, retries=0, backoff=1.0, **kwargs):
+    """
+    requests.get() that records latency, retries, status codes and bytes downloaded.
+    Retries (with linear backoff) on connection errors and 429/5xx; the default of 0
+    keeps plain requests.get() behaviour. Raises the last RequestException if all attempts fail.
+    """
+    attempt = 0
+    while True:
+        count("http.requests")
+        started = time.perf_counter()
+        try:
+            resp = requests.get(url, **kwargs)
+        except requests.RequestException:
+            observe("http.latency_ms", (time.perf_counter() - started) * 1000)
+            count("http.errors")
+            if attempt >= retries:
+                observe("http.retries", attempt, RETRY_BUCKETS)
+                raise
+        else:
+            observe("http.latency_ms", (time.perf_counter() - started) * 1000)
+            count(f"http.status.{resp.status_code}")
+            count("http.bytes_downloaded", len(resp.content))
+            if resp.status_code not in RETRY_STATUSES or attempt >= retries:
+                observe("http.retries", attempt, RETRY_BUCKETS)
+                return resp
+        attempt += 1
+        timed_sleep(backoff * attempt, "http.backoff")
+
+# --- Reporting ---
+
+def _merge_profile(run, stage, profiler):
+    os.makedirs(REPORT_DIR, exist_ok=True)
+    path = os.path.join(REPORT_DIR, f"{run.name}-{run.started_at:%Y%m%d-%H%M%S}.{stage}.prof")
+    existing = run.profiles.get(stage)
+    if existing:
+        # Repeated calls accumulate into one file per stage.
+        stats = pstats.Stats(profiler)
+        stats.add(existing)
+        stats.dump_stats(path)
+    else:
+        profiler.dump_stats(path)
+    run.profiles[stage] = path
+
+def write_report(run=None):
+    """Writes the run report as JSON under REPORT_DIR. Safe to call more than once."""
+    run = run or _RUN
+    os.makedirs(REPORT_DIR, exist_ok=True)
+    path = run.report_path or os.path.join(REPORT_DIR, f"{run.name}-{run.started_at:%Y%m%d-%H%M%S}.json")
+    with open(path, "w") as f:
+        json.dump(run.report(), f, indent=2)
+    run.report_path = path
+    # stderr: merge_and_analyze prints its result JSON on stdout.
+    print(f"[instrumentation] run report → {path}", file=sys.stderr)
+    return path
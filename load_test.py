@@ -0,0 +1,153 @@
+import argparse
+import asyncio
+import json
+import random
+import time
+from datetime import date, timedelta
+
+# --- Configuration ---
+# A mix of the query shapes the frontend and analysts use. Repeats are intentional:
+# they exercise the result cache the way real traffic would.
+QUERY_MIX = [
+    "/draws?state=illinois&game=pick3&slot=midday&window=60",
+    "/draws?state=illinois&game=pick4&slot=evening&window=60",
+    "/draws?state=florida&game=pick3&slot=evening&start=2024-01-01&end=2024-12-31",
+    "/draws?state=florida&game=pick4&slot=midday&start=2025-01-01",
+    "/combo?state=illinois&game=pick3&slot=midday&combo=34&window=365",
+    "/combo?state=florida&game=pick3&slot=evening&combo=71&start=2023-01-01",
+    "/combo?state=florida&game=pick4&slot=midday&combo=05&window=730",
+]
+# Parameter space for --distinct queries, which never repeat so every request
+# misses the cache and measures the query path itself.
+SERIES = [(state, game, slot) for state in ("illinois", "florida")
+          for game in ("pick3", "pick4") for slot in ("midday", "evening")]
+HISTORY_START = date(2013, 1, 1)
+HISTORY_END = date(2025, 11, 22)
+
+def random_query(rng):
+    """One /draws or /combo query with a random window or date range and combo."""
+    state, game, slot = rng.choice(SERIES)
+    path = rng.choice(("/draws", "/combo"))
+    query = f"{path}?state={state}&game={game}&slot={slot}"
+    if rng.random() < 0.5:
+        query += f"&window={rng.randint(1, 3650)}"
+    else:
+        span_days = (HISTORY_END - HISTORY_START).days
+        start = HISTORY_START + timedelta(days=rng.randrange(span_days))
+        end = start + timedelta(days=rng.randint(1, 3650))
+        query += f"&start={start.isoformat()}&end={min(end, HISTORY_END).isoformat()}"
+    if path == "/combo":
+        query += f"&combo={rng.randint(0, 99):02d}"
+    return query
+
+def distinct_queries(total, rng):
+    queries = {}
+    while len(queries) < total:
+        queries.setdefault(random_query(rng), None)
+    return list(queries)
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(pct / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+async def request(reader, writer, host, path):
+    """Sends one keep-alive GET and returns (status, body)."""
+    writer.write(f"GET {path} HTTP/1.1\r\nHost: {host}\r\n\r\n".encode("latin-1"))
+    await writer.drain()
+
+    status_line = await reader.readline()
+    status = int(status_line.split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b"\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value.strip())
+    body = await reader.readexactly(length)
+    return status, body
+
+async def worker(host, port, queue, latencies, errors):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        while True:
+            try:
+                path = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            started = time.perf_counter()
+            try:
+                status, _ = await request(reader, writer, host, path)
+            except (ConnectionError, asyncio.IncompleteReadError, ValueError, IndexError):
+                errors.append(path)
+                reader, writer = await asyncio.open_connection(host, port)
+                continue
+            latencies.append(time.perf_counter() - started)
+            if status != 200:
+                errors.append(path)
+    finally:
+        writer.close()
+
+async def fetch_stats(host, port):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        _, body = await request(reader, writer, host, "/stats")
+        return json.loads(body)
+    finally:
+        writer.close()
+
+async def run(host, port, total, concurrency, seed, distinct=False):
+    rng = random.Random(seed)
+    queue = asyncio.Queue()
+    paths = distinct_queries(total, rng) if distinct else [rng.choice(QUERY_MIX) for _ in range(total)]
+    for path in paths:
+        queue.put_nowait(path)
+
+    before = (await fetch_stats(host, port)).get("cache", {})
+    latencies, errors = [], []
+    started = time.perf_counter()
+    await asyncio.gather(*(worker(host, port, queue, latencies, errors) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    after = (await fetch_stats(host, port)).get("cache", {})
+    hits = after.get("hits", 0) - before.get("hits", 0)
+    misses = after.get("misses", 0) - before.get("misses", 0)
+    return {
+        "mode": "distinct" if distinct else "mix",
+        "requests": total,
+        "concurrency": concurrency,
+        "errors": len(errors),
+        "elapsed_s": round(elapsed, 3),
+        "throughput_rps": round(len(latencies) / elapsed, 1) if elapsed else None,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 3) if latencies else None,
+        "p99_ms": round(percentile(latencies, 99) * 1000, 3) if latencies else None,
+        "max_ms": round(latencies[-1] * 1000, 3) if latencies else None,
+        "cache_hits": hits,
+        "cache_misses": misses,
+        "cache_hit_rate": round(hits / (hits + misses), 4) if hits + misses else None,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Load test a local lotto_server.py instance.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--distinct", action="store_true",
+                        help="only send never-repeated queries (uncached latency); "
+                             "by default the cached mix runs first, then the distinct set")
+    args = parser.parse_args()
+
+    async def main():
+        reports = []
+        if not args.distinct:
+            reports.append(await run(args.host, args.port, args.requests, args.concurrency, args.seed))
+        reports.append(await run(args.host, args.port, args.requests, args.concurrency, args.seed, distinct=True))
+        return reports
+
+    print(json.dumps(asyncio.run(main()), indent=2))
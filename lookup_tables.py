@@ -0,0 +1,162 @@
+import hashlib
+import json
+import os
+from array import array
+
+# --- Configuration ---
+CACHE_DIR = ".cache"
+TABLE_FORMAT = 1
+GAME_DIGITS = {"pick3": 3, "pick4": 4}
+
+REPLACEMENT_VALUES = {
+    0: 5, 1: 9, 2: 8, 3: 7, 4: 6, 5: 0, 6: 4, 7: 3, 8: 2, 9: 1
+}
+
+# Column name -> array typecode. Every column has one entry per straight number (10**digits).
+COLUMNS = {
+    "box": "H",               # box class: digits sorted ascending, e.g. 321 -> 123
+    "ways": "B",              # straight numbers in the box class (6/3/1 for Pick 3)
+    "front_pair": "B",        # d0d1, the "combo" calculate_stats counts
+    "back_pair": "B",         # last two digits
+    "split_pair": "B",        # first and last digit
+    "mask": "H",              # bit d set when digit d is drawn
+    "replacement": "H",       # every digit mapped through REPLACEMENT_VALUES
+    "replacement_mask": "H",  # digits the replacement candidates cover
+}
+
+# --- Encoding ---
+# A draw is stored as its straight number: [0, 4, 7] -> 47 for Pick 3.
+
+def encode_draw(numbers, digits):
+    """Returns the straight-number code for a draw, or -1 if it is not `digits` int digits in 0-9."""
+    if len(numbers) != digits:
+        return -1
+    code = 0
+    for n in numbers:
+        # Exact int only: floats (1.0) and bools would encode to codes the arrays can't hold.
+        if type(n) is not int or not 0 <= n <= 9:
+            return -1
+        code = code * 10 + n
+    return code
+
+def decode_draw(code, digits):
+    return [int(c) for c in str(code).zfill(digits)]
+
+# --- Table Build ---
+
+def digit_mask(numbers):
+    """Bit d set for every digit d in 0-9 present in numbers; anything else is ignored."""
+    mask = 0
+    for n in numbers:
+        if 0 <= n <= 9:
+            mask |= 1 << n
+    return mask
+
+def build_columns(digits):
+    size = 10 ** digits
+    columns = {name: array(code, bytes(array(code).itemsize * size)) for name, code in COLUMNS.items()}
+    box_members = {}
+
+    for code in range(size):
+        ds = decode_draw(code, digits)
+        box = int("".join(str(d) for d in sorted(ds)))
+        box_members[box] = box_members.get(box, 0) + 1
+        replaced = [REPLACEMENT_VALUES[d] for d in ds]
+
+        columns["box"][code] = box
+        columns["front_pair"][code] = ds[0] * 10 + ds[1]
+        columns["back_pair"][code] = ds[-2] * 10 + ds[-1]
+        columns["split_pair"][code] = ds[0] * 10 + ds[-1]
+        columns["mask"][code] = digit_mask(ds)
+        columns["replacement"][code] = int("".join(str(d) for d in replaced))
+        columns["replacement_mask"][code] = digit_mask(replaced)
+
+    for code in range(size):
+        columns["ways"][code] = box_members[columns["box"][code]]
+    return columns
+
+# --- Disk Cache ---
+# Layout: one JSON header line, then each column's raw array bytes in COLUMNS order.
+
+def _cache_key(digits):
+    # Rebuild whenever the layout or the replacement map changes.
+    spec = json.dumps([TABLE_FORMAT, digits, COLUMNS, sorted(REPLACEMENT_VALUES.items())])
+    return hashlib.sha1(spec.encode("utf-8")).hexdigest()
+
+def _cache_path(digits):
+    return os.path.join(CACHE_DIR, f"lookup_pick{digits}.bin")
+
+def _read_cache(digits):
+    path = _cache_path(digits)
+    if not os.path.exists(path):
+        return None
+    size = 10 ** digits
+    with open(path, "rb") as f:
+        try:
+            header = json.loads(f.readline())
+        except ValueError:
+            return None
+        if header.get("key") != _cache_key(digits):
+            return None
+        columns = {}
+        try:
+            for name, code in COLUMNS.items():
+                columns[name] = array(code)
+                columns[name].fromfile(f, size)
+        except EOFError:
+            return None
+    return columns
+
+def _write_cache(digits, columns):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = _cache_path(digits)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(json.dumps({"key": _cache_key(digits)}).encode("utf-8") + b"\n")
+        for name in COLUMNS:
+            columns[name].tofile(f)
+    os.replace(tmp_path, path)
+
+# --- Public API ---
+
+class LookupTables:
+    """Dense per-straight-number columns for one game; index any column with a draw code."""
+
+    def __init__(self, digits, columns):
+        self.digits = digits
+        self.size = 10 ** digits
+        for name, column in columns.items():
+            setattr(self, name, column)
+
+_TABLES = {}
+
+def get_tables(game):
+    """Returns the LookupTables for "pick3"/"pick4", building and caching them on first use."""
+    digits = GAME_DIGITS[game]
+    if digits not in _TABLES:
+        columns = _read_cache(digits)
+        if columns is None:
+            columns = build_columns(digits)
+            try:
+                _write_cache(digits, columns)
+            except OSError:
+                pass  # read-only checkout: keep the in-memory tables
+        _TABLES[digits] = LookupTables(digits, columns)
+    return _TABLES[digits]
+
+def gather(column, codes):
+    """column[code] for every code; invalid (-1) codes map to `None`."""
+    return [column[c] if c >= 0 else None for c in codes]
+
+def bincount(values, size):
+    """Counts of each value in range(size); None entries are skipped."""
+    counts = [0] * size
+    for v in values:
+        if v is not None:
+            counts[v] += 1
+    return counts
+
+def encode_draws(draws, game):
+    """Codes for a list of draw number lists, as a signed array (-1 = invalid draw)."""
+    digits = GAME_DIGITS[game]
+    return array("h", [encode_draw(numbers, digits) for numbers in draws])
@@ -0,0 +1,303 @@
+import argparse
+import asyncio
+import json
+import traceback
+from collections import OrderedDict
+from datetime import datetime
+from urllib.parse import parse_qs, urlsplit
+
+from draw_store import DrawStore, parse_draw_date
+from lookup_tables import GAME_DIGITS, gather, get_tables
+from merge_and_analyze import analyze_combo_masks
+
+# --- Configuration ---
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+CACHE_SIZE = 1024
+REFRESH_SECONDS = 30  # how often to check the history files for new draws
+
+# --- Result Cache ---
+
+class QueryCache:
+    """LRU of encoded responses. Keys include the store version, so stale entries can never be served."""
+
+    def __init__(self, maxsize=CACHE_SIZE):
+        self.maxsize = maxsize
+        self.entries = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        body = self.entries.get(key)
+        if body is None:
+            self.misses += 1
+            return None
+        self.entries.move_to_end(key)
+        self.hits += 1
+        return body
+
+    def put(self, key, body):
+        self.entries[key] = body
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "size": len(self.entries),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else None,
+        }
+
+# --- Query Handling ---
+
+class BadRequest(Exception):
+    pass
+
+def parse_query(params):
+    """Validates the shared query parameters. Raises BadRequest with a readable message."""
+    def single(name, default=None):
+        values = params.get(name)
+        return values[-1] if values else default
+
+    state = single("state")
+    game = single("game")
+    slot = single("slot")
+    if not state or not game or not slot:
+        raise BadRequest("state, game and slot are required")
+
+    try:
+        start = parse_draw_date(single("start")) if single("start") else None
+        end = parse_draw_date(single("end")) if single("end") else None
+    except ValueError:
+        raise BadRequest("start/end must be YYYY-MM-DD")
+
+    window = single("window")
+    if window is not None:
+        if not (window.isascii() and window.isdigit()) or int(window) == 0:
+            raise BadRequest("window must be a positive integer")
+        window = int(window)
+
+    return {
+        "state": state.lower(),
+        "game": game.lower(),
+        "slot": slot.lower(),
+        "start": start,
+        "end": end,
+        "window": window,
+        "combo": single("combo"),
+    }
+
+def query_draws(store, q):
+    draws = store.select(q["state"], q["game"], q["slot"], q["start"], q["end"], q["window"])
+    return {
+        "ok": True,
+        "count": len(draws),
+        "draws": [{"date": d["date"].isoformat(), "numbers": d["numbers"]} for d in draws],
+    }
+
+def query_combo(store, q):
+    combo = q["combo"]
+    if not combo or not (combo.isascii() and combo.isdigit()):
+        raise BadRequest("combo must be a string of digits, e.g. 34")
+    if q["game"] not in GAME_DIGITS:
+        raise BadRequest(f"combo analysis supports {', '.join(GAME_DIGITS)}")
+    dates, codes = store.select_codes(q["state"], q["game"], q["slot"], q["start"], q["end"], q["window"])
+    if not dates:
+        return {"ok": True, "count": 0, "result": None}
+    masks = gather(get_tables(q["game"]).mask, codes)
+    return {
+        "ok": True,
+        "count": len(dates),
+        "result": analyze_combo_masks(combo, dates, masks),
+    }
+
+QUERY_ROUTES = {
+    "/draws": query_draws,
+    "/combo": query_combo,
+}
+
+# --- Server ---
+
+class LottoServer:
+    def __init__(self, store, cache_size=CACHE_SIZE, refresh_seconds=REFRESH_SECONDS):
+        self.store = store
+        self.cache = QueryCache(cache_size)
+        self.refresh_seconds = refresh_seconds
+        self.started_at = datetime.now()
+        self.cached_version = store.version
+
+    def sync_version(self):
+        """Drops every cached body once the store has moved to a new version."""
+        if self.store.version != self.cached_version:
+            self.cache.clear()
+            self.cached_version = self.store.version
+
+    def handle(self, method, target, body):
+        """Returns (status, encoded_json_body)."""
+        url = urlsplit(target)
+        params = parse_qs(url.query)
+
+        if method == "GET" and url.path == "/health":
+            return 200, encode({"ok": True, "version": self.store.version})
+
+        if method == "GET" and url.path == "/stats":
+            return 200, encode({
+                "ok": True,
+                "version": self.store.version,
+                "started_at": self.started_at.isoformat(),
+                "series": {"/".join(k): len(self.store.series[k]["dates"]) for k in self.store.keys()},
+                "rejected": {"/".join(k): n for k, n in self.store.rejected.items()},
+                "cache": self.cache.stats(),
+            })
+
+        if method == "POST" and url.path == "/ingest":
+            return self.handle_ingest(body)
+
+        route = QUERY_ROUTES.get(url.path)
+        if method != "GET" or route is None:
+            return 404, encode({"ok": False, "error": f"no route for {method} {url.path}"})
+
+        try:
+            q = parse_query(params)
+        except BadRequest as e:
+            return 400, encode({"ok": False, "error": str(e)})
+
+        self.sync_version()
+        key = (url.path, tuple(sorted(q.items())), self.store.version)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return 200, cached
+
+        try:
+            result = encode(route(self.store, q))
+        except BadRequest as e:
+            return 400, encode({"ok": False, "error": str(e)})
+
+        self.cache.put(key, result)
+        return 200, result
+
+    def handle_ingest(self, body):
+        """
+        Accepts {"state", "game", "slot", "draws": [{"date": "YYYY-MM-DD", "numbers": [..]}]}.
+        Any new draw bumps the store version, which invalidates the cache.
+        Ingested draws are held in memory (and survive history reloads) but are
+        not written back to the history files.
+        """
+        try:
+            payload = json.loads(body or b"{}")
+            draws = [(d["date"], d["numbers"]) for d in payload["draws"]]
+            added = self.store.ingest(payload["state"].lower(), payload["game"].lower(),
+                                      payload["slot"].lower(), draws)
+        except (ValueError, KeyError, TypeError, AttributeError) as e:
+            return 400, encode({"ok": False, "error": f"bad ingest payload: {e}"})
+
+        self.sync_version()
+        return 200, encode({"ok": True, "added": added, "version": self.store.version})
+
+    async def on_connection(self, reader, writer):
+        """Serves HTTP/1.1 requests on one connection until the client closes it."""
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, target, _ = request_line.decode("latin-1").split(" ", 2)
+                except ValueError:
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+
+                keep_alive = headers.get("connection", "").lower() != "close"
+                length = headers.get("content-length", "") or "0"
+                if not (length.isascii() and length.isdigit()):
+                    # Can't tell where the body ends, so answer and drop the connection.
+                    status, payload = 400, encode({"ok": False, "error": "invalid Content-Length"})
+                    keep_alive = False
+                else:
+                    length = int(length)
+                    body = await reader.readexactly(length) if length else b""
+                    try:
+                        status, payload = self.handle(method.upper(), target, body)
+                    except Exception:
+                        traceback.print_exc()
+                        status, payload = 500, encode({"ok": False, "error": "internal server error"})
+
+                writer.write(
+                    f"HTTP/1.1 {status} {STATUS_TEXT.get(status, 'OK')}\r\n"
+                    f"Content-Type: application/json\r\n"
+                    f"Content-Length: {len(payload)}\r\n"
+                    f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n".encode("latin-1")
+                    + payload
+                )
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def refresh_loop(self):
+        """
+        Picks up draws the scrapers wrote to disk since the last check. Files are
+        parsed in a worker thread and swapped in once complete; a failed read
+        (e.g. a file caught mid-write) keeps the current data and retries next tick.
+        """
+        while True:
+            await asyncio.sleep(self.refresh_seconds)
+            try:
+                if not self.store.changed():
+                    continue
+                loaded = await asyncio.to_thread(self.store.read_sources)
+                self.store.apply(*loaded)
+            except Exception as e:
+                print(f"[refresh] reload failed, serving version {self.store.version}: {e!r}")
+                continue
+            self.sync_version()
+            print(f"[refresh] history reloaded -> version {self.store.version}")
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.on_connection, host, port)
+        print(f"Serving lotto queries on http://{host}:{port}")
+        refresher = asyncio.create_task(self.refresh_loop())
+        try:
+            async with server:
+                await server.serve_forever()
+        finally:
+            refresher.cancel()
+
+STATUS_TEXT = {200: "OK", 400: "Bad Request", 404: "Not Found", 500: "Internal Server Error"}
+
+def encode(data):
+    return json.dumps(data, default=str).encode("utf-8")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Cached query API over the lotto draw history.")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--cache-size", type=int, default=CACHE_SIZE)
+    parser.add_argument("--refresh", type=int, default=REFRESH_SECONDS, help="seconds between history file checks")
+    args = parser.parse_args()
+
+    print("Loading draw history...")
+    store = DrawStore().load()
+    print(f"Loaded {len(store.keys())} series.")
+
+    try:
+        asyncio.run(LottoServer(store, args.cache_size, args.refresh).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        print("\nStopped.")
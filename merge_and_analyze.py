@@ -3,6 +3,9 @@ import datetime
 from datetime import timedelta
 import requests
 
+from instrumentation import span, start_run, timed
+from lookup_tables import GAME_DIGITS, REPLACEMENT_VALUES, digit_mask, encode_draws, get_tables
+
 # --- Configuration ---
 STATES = {
     "illinois": {
@@ -19,10 +22,6 @@ STATES = {
     }
 }
 
-REPLACEMENT_VALUES = {
-    0: 5, 1: 9, 2: 8, 3: 7, 4: 6, 5: 0, 6: 4, 7: 3, 8: 2, 9: 1
-}
-
 # --- Helper Functions ---
 
 def parse_date(date_str):
@@ -34,16 +33,27 @@ def parse_date(date_str):
 def get_replacement(num):
     return REPLACEMENT_VALUES.get(num, num)
 
-def check_win_7day(target_candidate, draws, start_index):
+def draw_masks(draws, game_type):
+    """
+    Digit-presence bitmask per draw, gathered from the precomputed lookup table
+    instead of scanning each numbers list. Draws that don't encode for the game
+    fall back to building the mask from their digits.
+    """
+    if game_type not in GAME_DIGITS:
+        return [digit_mask(d['numbers']) for d in draws]
+    mask = get_tables(game_type).mask
+    codes = encode_draws([d['numbers'] for d in draws], game_type)
+    return [mask[c] if c >= 0 else digit_mask(d['numbers']) for c, d in zip(codes, draws)]
+
+def first_hit_7day(candidate_bit, masks, start_index):
     """
-    Checks if the target_candidate appears in draws[start_index] to draws[start_index + 7].
-    Returns the date of the win if found, else None.
+    Checks if candidate_bit is set in masks[start_index] to masks[start_index + 6].
+    Returns the index of the first draw in that 7-draw window containing it, else None.
     """
-    # Look ahead up to 7 days (or as many as exist)
-    limit = min(len(draws), start_index + 7)
+    limit = min(len(masks), start_index + 7)
     for i in range(start_index, limit):
-        if target_candidate in draws[i]['numbers']:
-            return draws[i]['date']
+        if masks[i] & candidate_bit:
+            return i
     return None
 
 def analyze_combo_performance(combo_str, draws, game_type):
@@ -52,9 +62,19 @@ def analyze_combo_performance(combo_str, draws, game_type):
     """
     # 1. Sort draws by date ascending (oldest first) to simulate timeline
     sorted_draws = sorted(draws, key=lambda x: x['date'])
-    
+    dates = [d['date'] for d in sorted_draws]
+    return analyze_combo_masks(combo_str, dates, draw_masks(sorted_draws, game_type))
+
+@timed("analyze_combo_performance", label=lambda combo_str, dates, masks: combo_str)
+def analyze_combo_masks(combo_str, dates, masks):
+    """
+    analyze_combo_performance over pre-gathered digit masks (oldest first).
+    Callers scoring many combos against the same draws gather the masks once
+    (draw_masks, or get_tables(game).mask over DrawStore codes) and reuse them.
+    """
     # Initialize State
     base_num = int(combo_str[0]) # e.g., 3
+    base_bit = 1 << base_num
     is_active = False # "off"
     
     wins = 0
@@ -67,13 +87,12 @@ def analyze_combo_performance(combo_str, draws, game_type):
     latest_win_date = None
     latest_play_date = None
     
-    # Iterate through history
-    for i, draw in enumerate(sorted_draws):
-        draw_nums = draw['numbers']
-        draw_date = draw['date']
+    # Iterate through history; each draw is a bit test against its mask
+    for i, draw_mask in enumerate(masks):
+        draw_date = dates[i]
         
         # Check if Base is drawn (Activator)
-        if base_num in draw_nums:
+        if draw_mask & base_bit:
             # If not active, turn ON
             if not is_active:
                 is_active = True
@@ -86,8 +105,9 @@ def analyze_combo_performance(combo_str, draws, game_type):
                 latest_play_date = draw_date
                 
                 # Check for Win in next 7 days
-                # We pass the full sorted list and the NEXT index
-                win_date = check_win_7day(candidate, sorted_draws, i + 1)
+                # We pass the full mask list and the NEXT index
+                hit = first_hit_7day(1 << candidate, masks, i + 1)
+                win_date = dates[hit] if hit is not None else None
                 
                 pair_record = {
                     "play_dt": draw_date.isoformat(),
@@ -153,13 +173,17 @@ def main():
     
     # Process Illinois
     # In real script: il_draws = extract_data(...)
-    il_draws = generate_mock_draws() 
+    with span("generate_mock_draws"):
+        il_draws = generate_mock_draws()
     
     top_combos = []
-    # Analyze 00-99
+    # Gather the draw masks once, then analyze 00-99 against them
+    sorted_draws = sorted(il_draws, key=lambda x: x['date'])
+    dates = [d['date'] for d in sorted_draws]
+    masks = draw_masks(sorted_draws, "pick3")
     for i in range(100):
         combo = f"{i:02d}"
-        result = analyze_combo_performance(combo, il_draws, "pick3")
+        result = analyze_combo_masks(combo, dates, masks)
         top_combos.append(result)
         
     top_combos.sort(key=lambda x: x['wins'], reverse=True)
@@ -180,4 +204,5 @@ def main():
     print(json.dumps(output, indent=2))
 
 if __name__ == "__main__":
+    start_run("merge_and_analyze")
     main()
\ No newline at end of file
@@ -4,6 +4,9 @@ import subprocess
 import os
 from datetime import datetime
 
+from history_reader import HistoryReader
+from instrumentation import count, span, start_run, timed
+
 # ------------------------------------------------------
 # Configuration: Google AI Studio Endpoint + API Key
 # ------------------------------------------------------
@@ -11,10 +14,14 @@ from datetime import datetime
 # GOOGLE_AI_URL = "https://generativelanguage.googleapis.com/v1beta/models/gemini-2.0-flash-lite:generateContent"
 # GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")  # export GOOGLE_API_KEY="xxxxx"
 
+# Latest N draws per game/slot to include in the package. None sends the full history.
+HISTORY_WINDOW = None
+
 # ------------------------------------------------------
 # Helper: Run Your Existing Analyzer
 # ------------------------------------------------------
 
+@timed()
 def run_merge_and_analyze():
     print("Running merge_and_analyze.py ...")
     result = subprocess.run(
@@ -38,18 +45,38 @@ def run_merge_and_analyze():
 # Helper: Load Illinois + Florida Full History
 # ------------------------------------------------------
 
-def load_history():
+@timed()
+def load_history(window=HISTORY_WINDOW):
     if not os.path.exists("lottery_net_history.json"):
         print("History file not found: lottery_net_history.json")
         return {}
 
-    with open("lottery_net_history.json", "r") as f:
-        return json.load(f)
+    if window is None:
+        with open("lottery_net_history.json", "r") as f:
+            return json.load(f)
+
+    # Only the newest draws are needed: read them through the offset index
+    # instead of parsing the whole multi-megabyte file.
+    reader = HistoryReader("lottery_net_history.json")
+    history = {}
+    for game, slot in reader.keys():
+        history.setdefault(game, {})[slot] = [
+            {
+                "dt": f"{d['date'].isoformat()} 00:00:00",
+                "date_str": f"{d['date'].isoformat()} ({slot})",
+                "slot": slot,
+                "numbers": d["numbers"]
+            }
+            for d in reader.latest(game, slot, window)
+        ]
+    # Same top-level shape as the full file: house, generated_at, history
+    return dict(reader.meta(), history=history)
 
 # ------------------------------------------------------
 # Helper: Send to Google AI Studio
 # ------------------------------------------------------
 
+@timed()
 def send_to_google_studio(data):
     print("Sending data to Google AI Studio...")
 
@@ -57,19 +84,21 @@ def send_to_google_studio(data):
         "Content-Type": "application/json"
     }
 
-    payload = {
-        "contents": [
-            {
-                "role": "user",
-                "parts": [
-                    {
-                        "text": "Incoming data package from Lotto System:\n\n" +
-                                json.dumps(data, indent=2)
-                    }
-                ]
-            }
-        ]
-    }
+    with span("send_to_google_studio.encode"):
+        payload = {
+            "contents": [
+                {
+                    "role": "user",
+                    "parts": [
+                        {
+                            "text": "Incoming data package from Lotto System:\n\n" +
+                                    json.dumps(data, indent=2)
+                        }
+                    ]
+                }
+            ]
+        }
+    count("payload.bytes", len(payload["contents"][0]["parts"][0]["text"].encode("utf-8")))
 
     # url = f"{GOOGLE_AI_URL}?key={GOOGLE_API_KEY}"
     # response = requests.post(url, headers=headers, json=payload)
@@ -106,4 +135,5 @@ def main():
 
 
 if __name__ == "__main__":
+    start_run("send_to_google_ai")
     main()
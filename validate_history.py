@@ -0,0 +1,201 @@
+import argparse
+import json
+import os
+import sys
+import time
+from array import array
+from datetime import date
+
+from draw_store import CODE_TYPECODE, HISTORY_SOURCES, MAX_CODE_DIGITS, iter_source_rows
+from instrumentation import span, start_run
+from lookup_tables import GAME_DIGITS
+
+# --- Configuration ---
+GAP_FILE = "data_gaps.json"
+# Weekdays (Mon=0) each state draws on. Both states draw midday and evening every day.
+DRAW_WEEKDAYS = {
+    "illinois": {0, 1, 2, 3, 4, 5, 6},
+    "florida": {0, 1, 2, 3, 4, 5, 6},
+}
+# Dates with no scheduled draw, per state (ISO strings), e.g. a lottery holiday.
+NO_DRAW_DATES = {
+    "illinois": set(),
+    "florida": set(),
+}
+MAX_EXAMPLES = 20  # issues listed per kind in the report; counts are always complete
+
+# --- Columnar Load ---
+
+def load_columns(sources=HISTORY_SOURCES):
+    """
+    Flattens every history file into per-(state, game, slot) columns, keeping
+    every row as scraped (no de-duplication) so problems stay visible:
+    ordinals (date.toordinal), codes (straight number, -1 if not encodable),
+    counts (digits in the row), bad (1 if any digit is outside 0-9),
+    plus the source path and raw numbers of each row for reporting.
+    """
+    columns = {}
+    for state, paths in sources.items():
+        for path in paths:
+            if not os.path.exists(path):
+                continue
+            for game, slot, draw_date, numbers in iter_source_rows(path):
+                col = columns.get((state, game, slot))
+                if col is None:
+                    col = columns[(state, game, slot)] = {
+                        "ordinals": array("i"), "codes": array(CODE_TYPECODE), "counts": array("B"),
+                        "bad": array("B"), "sources": [], "numbers": [],
+                    }
+                digits = GAME_DIGITS.get(game, len(numbers))
+                code, bad = 0, 0
+                for n in numbers:
+                    if isinstance(n, int) and 0 <= n <= 9:
+                        code = code * 10 + n
+                    else:
+                        bad = 1
+                col["ordinals"].append(draw_date.toordinal())
+                encodable = not bad and len(numbers) == digits <= MAX_CODE_DIGITS
+                col["codes"].append(code if encodable else -1)
+                col["counts"].append(min(len(numbers), 255))
+                col["bad"].append(bad)
+                col["sources"].append(path)
+                col["numbers"].append(numbers)
+    return columns
+
+# --- Checks ---
+
+def _iso(ordinal):
+    return date.fromordinal(ordinal).isoformat()
+
+def _ranges(ordinals):
+    """Collapses sorted ordinals into inclusive (start, end) runs."""
+    runs = []
+    for o in ordinals:
+        if runs and o == runs[-1][1] + 1:
+            runs[-1][1] = o
+        else:
+            runs.append([o, o])
+    return runs
+
+def check_series(key, col, through=None):
+    """Returns the issue lists for one (state, game, slot) column set."""
+    state, game, slot = key
+    ordinals, codes, counts, bad = col["ordinals"], col["codes"], col["counts"], col["bad"]
+    expected_digits = GAME_DIGITS.get(game)
+
+    issues = {"duplicates": [], "conflicts": [], "out_of_range": [], "wrong_digit_count": []}
+
+    # Duplicates and conflicts: sort row indexes by date, compare neighbours.
+    order = sorted(range(len(ordinals)), key=ordinals.__getitem__)
+    for a, b in zip(order, order[1:]):
+        if ordinals[a] != ordinals[b]:
+            continue
+        same = codes[a] == codes[b] and (codes[a] >= 0 or col["numbers"][a] == col["numbers"][b])
+        issues["duplicates" if same else "conflicts"].append({
+            "date": _iso(ordinals[a]),
+            "numbers": [col["numbers"][a], col["numbers"][b]],
+            "sources": sorted({col["sources"][a], col["sources"][b]}),
+        })
+
+    for i in (i for i, flag in enumerate(bad) if flag):
+        issues["out_of_range"].append({"date": _iso(ordinals[i]), "numbers": col["numbers"][i],
+                                       "source": col["sources"][i]})
+
+    if expected_digits is not None:
+        for i in (i for i, c in enumerate(counts) if c != expected_digits):
+            issues["wrong_digit_count"].append({"date": _iso(ordinals[i]), "numbers": col["numbers"][i],
+                                                "expected": expected_digits, "source": col["sources"][i]})
+
+    # Missing dates against the draw calendar, from the first stored draw through `through`.
+    gaps = []
+    if ordinals:
+        first = ordinals[order[0]]
+        last = max(through or 0, ordinals[order[-1]])
+        present = set(ordinals)
+        weekdays = DRAW_WEEKDAYS.get(state, set(range(7)))
+        skip = {date.fromisoformat(d).toordinal() for d in NO_DRAW_DATES.get(state, ())}
+        missing = [o for o in range(first, last + 1)
+                   if o not in present and o not in skip and (o - 1) % 7 in weekdays]
+        gaps = [{"state": state, "game": game, "slot": slot, "start": _iso(lo), "end": _iso(hi), "days": hi - lo + 1}
+                for lo, hi in _ranges(missing)]
+
+    return issues, gaps
+
+def validate(sources=HISTORY_SOURCES, through=None):
+    """
+    Runs every check over every series. `through` (a date) extends the expected
+    calendar; by default each state is expected up to its newest draw in any series.
+    """
+    with span("validate.load_columns"):
+        columns = load_columns(sources)
+
+    state_last = {}
+    for (state, _, _), col in columns.items():
+        if col["ordinals"]:
+            state_last[state] = max(state_last.get(state, 0), max(col["ordinals"]))
+
+    report = {"series": {}, "gaps": []}
+    with span("validate.checks"):
+        for key in sorted(columns):
+            limit = through.toordinal() if through else state_last.get(key[0])
+            issues, gaps = check_series(key, columns[key], limit)
+            report["series"]["/".join(key)] = {
+                "rows": len(columns[key]["ordinals"]),
+                "counts": dict({k: len(v) for k, v in issues.items()}, missing_days=sum(g["days"] for g in gaps)),
+                "examples": {k: v[:MAX_EXAMPLES] for k, v in issues.items() if v},
+            }
+            report["gaps"].extend(gaps)
+    return report
+
+# Conflicts, bad digits and wrong digit counts corrupt the analysis; duplicates
+# and missing days only thin it, so they gate publishing only with --strict.
+ERROR_KINDS = ("conflicts", "out_of_range", "wrong_digit_count")
+WARNING_KINDS = ("duplicates", "missing_days")
+
+def summarize(report):
+    totals = {k: 0 for k in ERROR_KINDS + WARNING_KINDS}
+    for series in report["series"].values():
+        for k, v in series["counts"].items():
+            totals[k] += v
+    return totals
+
+def load_gaps(path=GAP_FILE, state=None):
+    """Reads a gap list written by this script, optionally for one state. Used by the scrapers."""
+    if not os.path.exists(path):
+        return []
+    with open(path, "r") as f:
+        gaps = json.load(f)
+    return [g for g in gaps if state is None or g["state"] == state]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Validate every draw history and list missing draw dates.")
+    parser.add_argument("--gaps", default=GAP_FILE, help="where to write the gap list for the scrapers")
+    parser.add_argument("--report", help="also write the full report JSON here")
+    parser.add_argument("--through", type=date.fromisoformat, help="expect draws up to this date (YYYY-MM-DD)")
+    parser.add_argument("--strict", action="store_true", help="fail on duplicates and missing days too")
+    args = parser.parse_args()
+
+    start_run("validate_history")
+    started = time.perf_counter()
+    report = validate(through=args.through)
+    elapsed = time.perf_counter() - started
+
+    with open(args.gaps, "w") as f:
+        json.dump(report["gaps"], f, indent=2)
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+
+    totals = summarize(report)
+    print(f"Validated {sum(s['rows'] for s in report['series'].values())} rows "
+          f"in {len(report['series'])} series in {elapsed * 1000:.0f} ms")
+    for name, series in report["series"].items():
+        flagged = {k: v for k, v in series["counts"].items() if v}
+        print(f"  {name:<26} {series['rows']:>6} rows  {flagged or 'ok'}")
+    print(f"Gap list: {len(report['gaps'])} ranges, {totals['missing_days']} missing days → {args.gaps}")
+
+    failing = ERROR_KINDS + (WARNING_KINDS if args.strict else ())
+    if any(totals[k] for k in failing):
+        print("FAILED: " + ", ".join(f"{k}={totals[k]}" for k in failing if totals[k]))
+        sys.exit(1)
+    print("OK")